@@ -1,13 +1,19 @@
-import os 
+import heapq
 import os
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from flask import Flask, jsonify, render_template, request
+from functools import lru_cache
+import orjson
+from flask import Flask, g, jsonify, render_template, request
+from flask.json.provider import JSONProvider
 
 from services.db import (
     init_db,
     load_categories,
     load_capacity_metrics,
     load_refreshes,
+    load_refreshes_bulk,
     load_semantic_models_by_workspace,
     load_schedules_by_workspace,
     load_reports_by_workspace,
@@ -18,6 +24,7 @@ from services.db import (
     update_semantic_models,
     upsert_category,
 )
+from services.perf_kernels import aggregate_refreshes, mean_interval_hours
 from services.pbi import (
     CACHE_SECONDS,
     fetch_refreshes,
@@ -30,7 +37,22 @@ from services.pbi import (
     trigger_refresh,
 )
 
+class OrjsonProvider(JSONProvider):
+    """Serve jsonify/tojson through orjson's C serializer.
+
+    The refresh-history and performance payloads run to megabytes; stdlib
+    json dominated those responses' CPU time.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CAPACITY_ID = os.environ.get("PBI_CAPACITY_ID")
 
 
@@ -38,9 +60,68 @@ def format_error(exc: Exception) -> str:
     return str(exc)
 
 
-def build_summary(workspaces, categories, semantic_models, refreshes_by_ws):
+@lru_cache(maxsize=65536)
+def _parse_ts(ts: str) -> datetime:
+    """Parse an ISO timestamp to an aware UTC datetime, memoized by raw string.
+
+    performance_sets re-walks the same refresh lists once per window, so the
+    same timestamps would otherwise be parsed several times per request.
+    """
+    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _request_cached(name, loader):
+    """Memoize a DB load on flask.g so duplicate calls within one request are free.
+
+    Only used on read paths; endpoints that write and re-read must call the
+    loader directly to see their own changes.
+    """
+    if not hasattr(g, name):
+        setattr(g, name, loader())
+    return getattr(g, name)
+
+
+def cached_categories():
+    return _request_cached("_categories", load_categories)
+
+
+def cached_semantic_models():
+    return _request_cached("_semantic_models", load_semantic_models_by_workspace)
+
+
+def _prepare_refresh_map(datasets):
+    """Annotate freshly loaded refresh rows for one workspace, in place.
+
+    Attaches ``_ts`` (epoch seconds as float, or None when the start time is
+    missing/unparseable) and ``_completed`` once per row so the aggregation
+    passes below read plain keys instead of re-parsing timestamps and
+    re-normalizing status strings on every traversal. Cutoff checks become
+    single float compares instead of aware-datetime comparisons. Rows are
+    sorted newest-first so index 0 is always the latest refresh.
+    """
+    for rlist in datasets.values():
+        for r in rlist:
+            ts = r["start_time"]
+            try:
+                r["_ts"] = _parse_ts(ts).timestamp() if ts else None
+            except Exception:
+                r["_ts"] = None
+            r["_completed"] = (r["status"] or "").lower() == "completed"
+        rlist.sort(key=lambda r: r["_ts"] or 0.0, reverse=True)
+    return datasets
+
+
+def _prepare_refreshes(refreshes_by_ws):
+    for datasets in refreshes_by_ws.values():
+        _prepare_refresh_map(datasets)
+    return refreshes_by_ws
+
+
+def build_summary(ws_by_id, categories, semantic_models, refreshes_by_ws):
     summary = {}
-    ws_by_id = {ws.get("id"): ws for ws in workspaces}
     ws_stats = {}
 
     for ws_id, cat in categories.items():
@@ -55,17 +136,22 @@ def build_summary(workspaces, categories, semantic_models, refreshes_by_ws):
         slow_models = []
 
         for m in models:
-            mid = m.get("model_id") or m.get("id")
+            mid = m["model_id"]
             rlist = refreshes.get(mid) or []
             if rlist:
                 latest = rlist[0]
-                if (latest.get("status") or "").lower() != "completed":
-                    failed_models.append(m.get("name") or mid)
-                durations = [r.get("duration_seconds") for r in rlist if r.get("duration_seconds") is not None]
-                if durations:
-                    avg = sum(durations) / len(durations)
-                    if (latest.get("duration_seconds") or 0) > avg * 1.1:
-                        slow_models.append(m.get("name") or mid)
+                name = m["name"] or mid
+                if not latest["_completed"]:
+                    failed_models.append(name)
+                dur_sum = 0.0
+                dur_count = 0
+                for r in rlist:
+                    d = r["duration_seconds"]
+                    if d is not None:
+                        dur_sum += d
+                        dur_count += 1
+                if dur_count and (latest["duration_seconds"] or 0) > (dur_sum / dur_count) * 1.1:
+                    slow_models.append(name)
 
         stats = {
             "model_count": len(models),
@@ -91,57 +177,52 @@ def build_summary(workspaces, categories, semantic_models, refreshes_by_ws):
     return summary, ws_stats
 
 
-def build_performance(workspaces, categories, semantic_models, refreshes_by_ws, skip_empty: bool = False):
-    ws_by_id = {ws.get("id"): ws for ws in workspaces}
+def build_performance(
+    ws_by_id,
+    env_lookup,
+    module_lookup,
+    semantic_models,
+    refreshes_by_ws,
+    skip_empty: bool = False,
+    interval_lookup=None,
+):
     models = []
 
     for ws_id, models_list in semantic_models.items():
         ws = ws_by_id.get(ws_id, {})
-        cat = categories.get(ws_id, {})
-        env = (cat.get("env") or "").upper()
-        module = cat.get("module") or "Unassigned"
+        env = env_lookup.get(ws_id, "")
+        module = module_lookup.get(ws_id, "Unassigned")
         refresh_map = refreshes_by_ws.get(ws_id, {})
 
         for m in models_list:
-            mid = m.get("model_id") or m.get("id")
+            mid = m["model_id"]
             rlist = refresh_map.get(mid) or []
             if skip_empty and not rlist:
                 continue
-            failures = len([r for r in rlist if (r.get("status") or "").lower() != "completed"])
-            successes = len([r for r in rlist if (r.get("status") or "").lower() == "completed"])
-            durations = [r.get("duration_seconds") for r in rlist if r.get("duration_seconds") is not None]
-            avg_sec = sum(durations) / len(durations) if durations else 0
+            failures, successes, avg_sec = aggregate_refreshes(rlist)
             last = rlist[0] if rlist else {}
             last_sec = last.get("duration_seconds") or 0
             outlier = avg_sec > 0 and last_sec > avg_sec * 1.1
             efficient = failures == 0 and avg_sec > 0 and avg_sec <= 300
 
-            # frequency/interval based on refresh history
-            freq_per_hour = 0
-            avg_interval_hours = 0
-            if rlist:
-                try:
-                    timestamps = []
-                    for r in rlist:
-                        ts = r.get("start_time") or r.get("startTime")
-                        if not ts:
-                            continue
-                        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                        if dt.tzinfo is None:
-                            dt = dt.replace(tzinfo=timezone.utc)
-                        else:
-                            dt = dt.astimezone(timezone.utc)
-                        timestamps.append(dt)
-                    timestamps.sort()
-                    if len(timestamps) >= 2:
-                        deltas = []
-                        for i in range(1, len(timestamps)):
-                            deltas.append((timestamps[i] - timestamps[i - 1]).total_seconds() / 3600.0)
-                        avg_interval_hours = sum(deltas) / len(deltas) if deltas else 0
+            # frequency/interval based on refresh history; callers that walk
+            # several windows pass a precomputed per-dataset lookup instead
+            if interval_lookup is not None:
+                avg_interval_hours = interval_lookup.get((ws_id, mid), 0)
+                freq_per_hour = 0 if avg_interval_hours == 0 else 1 / avg_interval_hours
+            else:
+                freq_per_hour = 0
+                avg_interval_hours = 0
+                if rlist:
+                    try:
+                        # rlist is newest-first; reverse for ascending deltas
+                        timestamps = [r["_ts"] for r in rlist if r["_ts"] is not None]
+                        timestamps.reverse()
+                        avg_interval_hours = mean_interval_hours(timestamps)
                         freq_per_hour = 0 if avg_interval_hours == 0 else 1 / avg_interval_hours
-                except Exception:
-                    freq_per_hour = 0
-                    avg_interval_hours = 0
+                    except Exception:
+                        freq_per_hour = 0
+                        avg_interval_hours = 0
 
             models.append(
                 {
@@ -150,7 +231,7 @@ def build_performance(workspaces, categories, semantic_models, refreshes_by_ws,
                     "env": env,
                     "module": module,
                     "model_id": mid,
-                    "model_name": m.get("name") or mid,
+                    "model_name": m["name"] or mid,
                     "avg_sec": avg_sec,
                     "last_sec": last_sec,
                     "failures": failures,
@@ -168,31 +249,47 @@ def build_performance(workspaces, categories, semantic_models, refreshes_by_ws,
 
 
 def filter_refreshes_by_window(refreshes_by_ws, cutoff: datetime | None):
+    """Scan-based counterpart of window_refreshes for prepared refresh maps.
+
+    Lists are newest-first (unparseable rows at the tail), so the scan stops
+    at the first row older than the cutoff instead of walking the rest.
+    """
     if not cutoff:
         return refreshes_by_ws
+    cutoff_ts = cutoff.timestamp()
     filtered = {}
     for ws_id, datasets in refreshes_by_ws.items():
         filtered[ws_id] = {}
         for ds_id, rlist in datasets.items():
             filtered_list = []
             for r in rlist:
-                ts = r.get("start_time") or r.get("startTime")
-                if not ts:
-                    continue
-                try:
-                    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=timezone.utc)
-                    else:
-                        dt = dt.astimezone(timezone.utc)
-                except Exception:
-                    continue
-                if dt >= cutoff:
-                    filtered_list.append(r)
+                dt = r.get("_ts")
+                if dt is None or dt < cutoff_ts:
+                    break
+                filtered_list.append(r)
             filtered[ws_id][ds_id] = filtered_list
     return filtered
 
 
+def window_refreshes(refreshes_by_ws, cutoff: datetime | None):
+    """Slice prepared (newest-first) refresh lists down to ``_ts >= cutoff``.
+
+    Because _prepare_refreshes sorts each dataset's rows descending, the rows
+    inside a window are a prefix of the list, so one bisect per dataset
+    replaces a full scan per window.
+    """
+    if not cutoff:
+        return refreshes_by_ws
+    cutoff_key = -cutoff.timestamp()
+    windowed = {}
+    for ws_id, datasets in refreshes_by_ws.items():
+        windowed[ws_id] = {
+            ds_id: rlist[: bisect_right(rlist, cutoff_key, key=lambda r: -(r["_ts"] or 0.0))]
+            for ds_id, rlist in datasets.items()
+        }
+    return windowed
+
+
 def build_capacity_series(capacity_metrics, cutoff: datetime | None):
     if not capacity_metrics:
         return []
@@ -203,11 +300,7 @@ def build_capacity_series(capacity_metrics, cutoff: datetime | None):
         if ts is None or val is None:
             continue
         try:
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            else:
-                dt = dt.astimezone(timezone.utc)
+            dt = _parse_ts(ts)
         except Exception:
             continue
         if cutoff is None or dt >= cutoff:
@@ -216,61 +309,64 @@ def build_capacity_series(capacity_metrics, cutoff: datetime | None):
     return series
 
 
-def performance_sets(workspaces, categories, semantic_models, refreshes_by_ws, capacity_metrics=None):
+def performance_sets(ws_by_id, categories, semantic_models, refreshes_by_ws, capacity_metrics=None):
     now = datetime.now(timezone.utc)
-    ws_lookup = {w.get("id"): w.get("name") for w in workspaces}
-    env_lookup = {ws_id: (categories.get(ws_id, {}).get("env") or "").upper() for ws_id in categories}
+    # shared lookups, built once for all three windows
+    env_lookup = {ws_id: (cat.get("env") or "").upper() for ws_id, cat in categories.items()}
+    module_lookup = {ws_id: cat.get("module") or "Unassigned" for ws_id, cat in categories.items()}
     windows = {
         "24h": now - timedelta(days=1),
         "7d": now - timedelta(days=7),
         "all": None,
     }
+    # the 24h refresh series is the same for every window; build it once from
+    # the already-sliced 24h prefix instead of re-deriving it per window
+    model_lookups = {
+        ws_id: {m["model_id"]: m["name"] for m in mlist} for ws_id, mlist in semantic_models.items()
+    }
+    # refresh cadence is a property of the full history, not of a display
+    # window; compute it once per dataset instead of once per window
+    interval_lookup = {}
+    for ws_id, datasets in refreshes_by_ws.items():
+        for ds_id, rlist in datasets.items():
+            timestamps = [r["_ts"] for r in rlist if r["_ts"] is not None]
+            timestamps.reverse()
+            interval_lookup[(ws_id, ds_id)] = mean_interval_hours(timestamps)
+    history24 = []
+    for ws_id, ds_map in window_refreshes(refreshes_by_ws, windows["24h"]).items():
+        ws_name = ws_by_id.get(ws_id, {}).get("name") or ws_id
+        env = env_lookup.get(ws_id, "")
+        model_lookup = model_lookups.get(ws_id, {})
+        for ds_id, rlist in ds_map.items():
+            if not rlist:
+                continue
+            points = [{"x": r["start_time"], "y": (r["duration_seconds"] or 0) / 60.0} for r in rlist]
+            # built from newest-first rows; charts want ascending time
+            points.reverse()
+            history24.append(
+                {
+                    "label": f"{model_lookup.get(ds_id, ds_id)} ({ws_name})",
+                    "env": env,
+                    "data": points,
+                }
+            )
+
     result = {}
     for key, cutoff in windows.items():
-        filtered = filter_refreshes_by_window(refreshes_by_ws, cutoff)
-        models = build_performance(workspaces, categories, semantic_models, filtered, skip_empty=False)
-        top_slow = sorted([m for m in models if m["avg_sec"] > 0], key=lambda x: x["avg_sec"], reverse=True)[:10]
-        top_fail = sorted([m for m in models if m["failures"] > 0], key=lambda x: x["failures"], reverse=True)[:10]
+        filtered = window_refreshes(refreshes_by_ws, cutoff)
+        models = build_performance(
+            ws_by_id,
+            env_lookup,
+            module_lookup,
+            semantic_models,
+            filtered,
+            skip_empty=False,
+            interval_lookup=interval_lookup,
+        )
+        top_slow = heapq.nlargest(10, (m for m in models if m["avg_sec"] > 0), key=lambda x: x["avg_sec"])
+        top_fail = heapq.nlargest(10, (m for m in models if m["failures"] > 0), key=lambda x: x["failures"])
         efficient = [m for m in models if m["efficient"]]
         outliers = [m for m in models if m["outlier"]]
-
-        history24 = []
-        window_cutoff = now - timedelta(hours=24)
-        for ws_id, ds_map in filtered.items():
-            ws_name = ws_lookup.get(ws_id, ws_id)
-            env = env_lookup.get(ws_id, "")
-            model_lookup = {m.get("model_id") or m.get("id"): m.get("name") for m in semantic_models.get(ws_id, [])}
-            for ds_id, rlist in ds_map.items():
-                if not rlist:
-                    continue
-                # include only refreshes in last 24h regardless of count
-                points = []
-                for r in rlist:
-                    ts = r.get("start_time") or r.get("startTime")
-                    if not ts:
-                        continue
-                    try:
-                        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                        if dt.tzinfo is None:
-                            dt = dt.replace(tzinfo=timezone.utc)
-                        else:
-                            dt = dt.astimezone(timezone.utc)
-                    except Exception:
-                        continue
-                    if dt < window_cutoff:
-                        continue
-                    dur = (r.get("duration_seconds") or 0) / 60.0
-                    points.append({"x": ts, "y": dur})
-                if not points:
-                    continue
-                points.sort(key=lambda p: p["x"])
-                history24.append(
-                    {
-                        "label": f"{model_lookup.get(ds_id, ds_id)} ({ws_name})",
-                        "env": env,
-                        "data": points,
-                    }
-                )
         cap_series = build_capacity_series(capacity_metrics or [], cutoff)
 
         result[key] = {
@@ -288,37 +384,19 @@ def performance_sets(workspaces, categories, semantic_models, refreshes_by_ws, c
 def compute_avg_interval_hours(refreshes_by_ds):
     freq = {}
     for ds_id, rlist in refreshes_by_ds.items():
-        timestamps = []
-        for r in rlist:
-            ts = r.get("start_time") or r.get("startTime")
-            if not ts:
-                continue
-            try:
-                dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                else:
-                    dt = dt.astimezone(timezone.utc)
-                timestamps.append(dt)
-            except Exception:
-                continue
-        timestamps.sort()
-        if len(timestamps) >= 2:
-            deltas = []
-            for i in range(1, len(timestamps)):
-                deltas.append((timestamps[i] - timestamps[i - 1]).total_seconds() / 3600.0)
-            freq[ds_id] = sum(deltas) / len(deltas) if deltas else 0
-        else:
-            freq[ds_id] = 0
+        # rlist is newest-first; reverse for ascending deltas
+        timestamps = [r["_ts"] for r in rlist if r["_ts"] is not None]
+        timestamps.reverse()
+        freq[ds_id] = mean_interval_hours(timestamps)
     return freq
 
 
 @app.route("/")
 def dashboard():
-    categories = load_categories()
-    semantic_models = load_semantic_models_by_workspace()
+    categories = cached_categories()
+    semantic_models = cached_semantic_models()
     # preload refreshes for all categorized workspaces
-    refreshes_by_ws = {ws_id: load_refreshes(ws_id) for ws_id in categories.keys()}
+    refreshes_by_ws = _prepare_refreshes(load_refreshes_bulk(categories.keys()))
     try:
         workspaces = fetch_workspaces()
         error = None
@@ -326,7 +404,8 @@ def dashboard():
         workspaces = []
         error = format_error(exc)
 
-    summary, ws_stats = build_summary(workspaces, categories, semantic_models, refreshes_by_ws)
+    ws_by_id = {ws.get("id"): ws for ws in workspaces}
+    summary, ws_stats = build_summary(ws_by_id, categories, semantic_models, refreshes_by_ws)
 
     return render_template(
         "dashboard.html",
@@ -342,10 +421,10 @@ def dashboard():
 
 @app.route("/performance")
 def performance():
-    categories = load_categories()
-    semantic_models = load_semantic_models_by_workspace()
+    categories = cached_categories()
+    semantic_models = cached_semantic_models()
     ws_ids = set(categories.keys()) | set(semantic_models.keys())
-    refreshes_by_ws = {ws_id: load_refreshes(ws_id) for ws_id in ws_ids}
+    refreshes_by_ws = _prepare_refreshes(load_refreshes_bulk(ws_ids))
     capacity_metrics = load_capacity_metrics(CAPACITY_ID)
     try:
         workspaces = fetch_workspaces()
@@ -354,7 +433,8 @@ def performance():
         workspaces = []
         error = format_error(exc)
 
-    perf = performance_sets(workspaces, categories, semantic_models, refreshes_by_ws, capacity_metrics)
+    ws_by_id = {ws.get("id"): ws for ws in workspaces}
+    perf = performance_sets(ws_by_id, categories, semantic_models, refreshes_by_ws, capacity_metrics)
 
     return render_template(
         "performance.html",
@@ -365,7 +445,7 @@ def performance():
 
 @app.route("/categorize", methods=["GET"])
 def categorize_page():
-    categories = load_categories()
+    categories = cached_categories()
     try:
         workspaces = fetch_workspaces()
         error = None
@@ -388,9 +468,9 @@ def categorize_page():
 
 @app.route("/api/workspaces")
 def api_workspaces():
-    categories = load_categories()
+    categories = cached_categories()
     try:
-        workspaces = fetch_workspaces()
+        workspaces = fetch_workspaces(force_refresh=request.args.get("nocache") == "1")
     except Exception as exc:  # pylint: disable=broad-except
         return jsonify({"ok": False, "message": format_error(exc)}), 500
 
@@ -485,32 +565,42 @@ def set_schedule(workspace_id, dataset_id):
         return jsonify({"ok": False, "message": format_error(exc)}), 500
 
 
+def _apply_schedule_one(workspace_id, dataset_id, payload):
+    """Takeover + schedule update + local save for one dataset; returns (ok, err)."""
+    try:
+        try:
+            takeover_dataset(workspace_id, dataset_id)
+        except Exception:
+            pass
+        update_refresh_schedule(workspace_id, dataset_id, payload)
+        try:
+            save_schedule(workspace_id, dataset_id, payload)
+        except Exception:
+            pass
+        return True, None
+    except Exception as exc:  # pylint: disable=broad-except
+        return False, format_error(exc)
+
+
 @app.route("/schedule-workspace/<workspace_id>", methods=["POST"])
 def set_workspace_schedule(workspace_id):
     payload = request.get_json(silent=True) or {}
     if not payload:
         return jsonify({"ok": False, "message": "schedule payload required"}), 400
-    semantic_models = load_semantic_models_by_workspace().get(workspace_id, [])
+    semantic_models = cached_semantic_models().get(workspace_id, [])
+    mids = [m["model_id"] for m in semantic_models if m["model_id"]]
     updated = []
     failed = {}
-    for m in semantic_models:
-        mid = m.get("model_id") or m.get("id")
-        if not mid:
-            continue
-        try:
-            try:
-                takeover_dataset(workspace_id, mid)
-            except Exception:
-                pass
-            update_refresh_schedule(workspace_id, mid, payload)
-            try:
-                save_schedule(workspace_id, mid, payload)
-            except Exception:
-                pass
-            updated.append(mid)
-        except Exception as exc:  # pylint: disable=broad-except
-            failed[mid] = format_error(exc)
-            continue
+    # I/O-bound Power BI calls: fan out so a big workspace doesn't take N x RTT
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        futures = {ex.submit(_apply_schedule_one, workspace_id, mid, payload): mid for mid in mids}
+        for fut in as_completed(futures):
+            mid = futures[fut]
+            ok, err = fut.result()
+            if ok:
+                updated.append(mid)
+            else:
+                failed[mid] = err
     return jsonify({"ok": True, "updated": updated, "failed": failed})
 
 
@@ -542,9 +632,9 @@ def fetch_reports_api(workspace_id):
 
 @app.route("/workspace/<workspace_id>")
 def workspace_detail(workspace_id):
-    categories = load_categories()
-    semantic_models = load_semantic_models_by_workspace()
-    refreshes = load_refreshes(workspace_id)
+    categories = cached_categories()
+    semantic_models = cached_semantic_models()
+    refreshes = _prepare_refresh_map(load_refreshes(workspace_id))
     avg_interval_hours = compute_avg_interval_hours(refreshes)
     schedules = load_schedules_by_workspace(workspace_id)
     try:
@@ -586,9 +676,9 @@ def dataset_detail(workspace_id, dataset_id):
     else:
         error = None
 
-    semantic_models = load_semantic_models_by_workspace()
+    semantic_models = cached_semantic_models()
     model_list = semantic_models.get(workspace_id, [])
-    dataset = next((m for m in model_list if m.get("model_id") == dataset_id or m.get("id") == dataset_id), None)
+    dataset = next((m for m in model_list if m["model_id"] == dataset_id), None)
 
     if do_refresh and workspace:
         try:
@@ -623,8 +713,9 @@ def refresh_model(workspace_id, dataset_id):
 
 
 if __name__ == "__main__":
+    # dev convenience only; serve through wsgi.py + gunicorn in production
     init_db()
     port = int(os.environ.get("PORT", "5000"))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    app.run(host="0.0.0.0", port=port, debug=os.environ.get("FLASK_DEBUG", "1") == "1")
 else:
     init_db()
@@ -1,347 +1,544 @@
 import os
 import sqlite3
-import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+
+import orjson
 
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 DB_PATH = os.environ.get("PBI_DB_PATH", os.path.join(ROOT_DIR, "categories.db"))
+READ_CACHE_SECONDS = float(os.environ.get("PBI_READ_CACHE_SECONDS", "30"))
+
+_CONN = None
+_CONN_PID = None
+_LOCK = threading.RLock()
+
+# Connections inherited across fork() (gunicorn --preload imports the app —
+# and opens _CONN via init_db — in the master before workers fork). SQLite
+# forbids using a connection on both sides of a fork: the POSIX locks and WAL
+# shm state belong to the parent's pid, and a child closing or recovering
+# through the inherited handle can truncate a WAL a sibling is still reading.
+# We park the inherited object here so it is never closed (not even by GC)
+# and open a fresh per-process connection instead.
+_ABANDONED_CONNS = []
+
+# Cache-aside store for the load_* helpers: request handlers hit the same
+# reads several times per page, and re-running the query plus re-building
+# the dicts each time is pure waste. Keys are tuples encoding every argument
+# so workspaces never collide. Writes from this process invalidate their
+# prefix directly; writes from sibling gunicorn workers are caught by the
+# PRAGMA data_version check below, which increments on our connection
+# whenever another connection commits, so a categorize saved by worker A is
+# visible to workers B-D on their next read rather than after the TTL.
+_READ_CACHE: dict[tuple, tuple[float, int, object]] = {}
+
+
+def _data_version(conn) -> int:
+    # a header-field read, no table I/O; only comparable on one connection
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _cache_get(key: tuple):
+    entry = _READ_CACHE.get(key)
+    if entry is None:
+        return None
+    expires, version, value = entry
+    if time.monotonic() >= expires:
+        _READ_CACHE.pop(key, None)
+        return None
+    with _db() as conn:
+        if _data_version(conn) != version:
+            # another process committed since this entry was filled; every
+            # cached snapshot is suspect, so drop them all
+            _READ_CACHE.clear()
+            return None
+    if _READ_CACHE.get(key) is not entry:
+        # _db() reopened after a fork and cleared the cache; the entry (and
+        # its version) came from another process, so don't trust it
+        return None
+    return value
+
+
+def _cache_put(key: tuple, value):
+    with _db() as conn:
+        version = _data_version(conn)
+    _READ_CACHE[key] = (time.monotonic() + READ_CACHE_SECONDS, version, value)
+    return value
+
+
+def _cache_invalidate(prefix: tuple):
+    for key in [k for k in _READ_CACHE if k[: len(prefix)] == prefix]:
+        _READ_CACHE.pop(key, None)
+
+
+# Hot write statements, hoisted so every call passes the identical string and
+# sqlite3's per-connection statement cache reuses the compiled plan instead of
+# re-parsing the SQL text. Timestamps are bound from Python, computed once per
+# call: no per-row datetime('now') in the SQLite VM, and all rows of one batch
+# share the same recorded_at/updated_at (one poll, one timestamp).
+SQL_UPSERT_CATEGORY = """
+    INSERT INTO categories(workspace_id, env, module, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(workspace_id) DO UPDATE SET
+        env=excluded.env,
+        module=excluded.module,
+        updated_at=excluded.updated_at
+"""
+SQL_UPSERT_MODEL = """
+    INSERT INTO semantic_models(workspace_id, model_id, name, added_at, deleted_at)
+    VALUES (?, ?, ?, ?, NULL)
+    ON CONFLICT(workspace_id, model_id) DO UPDATE SET
+        name=excluded.name,
+        deleted_at=NULL
+"""
+SQL_INSERT_REFRESH = """
+    INSERT OR REPLACE INTO refresh_history(workspace_id, dataset_id, start_time, end_time, status, duration_seconds, recorded_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_INSERT_METRIC = """
+    INSERT OR REPLACE INTO capacity_metrics(capacity_id, ts, metric, value, recorded_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_INSERT_REPORT = """
+    INSERT OR REPLACE INTO reports(workspace_id, report_id, name, dataset_id, web_url, embed_url, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_UPSERT_SCHEDULE = """
+    INSERT OR REPLACE INTO schedules(workspace_id, dataset_id, schedule_json, updated_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+def _connect():
+    """Open a connection with the per-connection pragmas applied.
+
+    journal_mode=WAL is set once in init_db and persists in the database
+    file; busy_timeout/mmap/cache settings are per-connection, so every
+    connection must go through here.
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    # Row supports both positional unpacking and row["col"] access without
+    # copying the result set into a list of plain tuples first.
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+@contextmanager
+def _db():
+    """Yield the shared per-process connection under the module lock.
+
+    Opening a connection per call threw away SQLite's per-connection page
+    cache on every request; one long-lived connection keeps it warm. The
+    lock serializes access so Flask worker threads can share it safely.
+    The pid check makes this fork-safe: a worker that inherited the
+    master's connection abandons it and opens its own (see
+    _ABANDONED_CONNS above), dropping the read cache with it so a fresh
+    process never serves snapshots cached in another process.
+    """
+    global _CONN, _CONN_PID
+    with _LOCK:
+        if _CONN is None or _CONN_PID != os.getpid():
+            if _CONN is not None:
+                _ABANDONED_CONNS.append(_CONN)
+                _READ_CACHE.clear()
+            _CONN = _connect()
+            _CONN_PID = os.getpid()
+        yield _CONN
+
+
+# Full schema as one script: executescript parses it once and runs all DDL
+# in a single pass, so the pragmas and indexes are guaranteed in place before
+# any other code path touches the database. WAL persists in the file; NORMAL
+# drops the per-commit full fsync barrier and lets readers run concurrently
+# with the writer. The refresh/capacity indexes exist because load_refreshes
+# orders by start_time within a workspace, which the (workspace_id,
+# dataset_id, start_time) PK can't serve without a temp-btree sort.
+_SCHEMA_SQL = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    CREATE TABLE IF NOT EXISTS categories (
+        workspace_id TEXT PRIMARY KEY,
+        env TEXT NOT NULL,
+        module TEXT,
+        updated_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS semantic_models (
+        workspace_id TEXT NOT NULL,
+        model_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        added_at TEXT NOT NULL,
+        deleted_at TEXT,
+        PRIMARY KEY (workspace_id, model_id)
+    );
+    CREATE TABLE IF NOT EXISTS refresh_history (
+        workspace_id TEXT NOT NULL,
+        dataset_id TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT,
+        status TEXT,
+        duration_seconds REAL,
+        recorded_at TEXT NOT NULL,
+        PRIMARY KEY (workspace_id, dataset_id, start_time)
+    );
+    CREATE TABLE IF NOT EXISTS reports (
+        workspace_id TEXT NOT NULL,
+        report_id TEXT NOT NULL,
+        name TEXT,
+        dataset_id TEXT,
+        web_url TEXT,
+        embed_url TEXT,
+        created_at TEXT,
+        PRIMARY KEY (workspace_id, report_id)
+    );
+    CREATE TABLE IF NOT EXISTS schedules (
+        workspace_id TEXT NOT NULL,
+        dataset_id TEXT NOT NULL,
+        schedule_json TEXT,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (workspace_id, dataset_id)
+    );
+    CREATE TABLE IF NOT EXISTS capacity_metrics (
+        capacity_id TEXT NOT NULL,
+        ts TEXT NOT NULL,
+        metric TEXT DEFAULT 'cu',
+        value REAL,
+        recorded_at TEXT NOT NULL,
+        PRIMARY KEY (capacity_id, ts, metric)
+    );
+    CREATE TABLE IF NOT EXISTS api_cache (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        expires REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_refresh_ws_start ON refresh_history(workspace_id, start_time DESC);
+    CREATE INDEX IF NOT EXISTS idx_capmet_cap_ts ON capacity_metrics(capacity_id, ts);
+    ANALYZE;
+"""
 
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS categories (
-            workspace_id TEXT PRIMARY KEY,
-            env TEXT NOT NULL,
-            module TEXT,
-            updated_at TEXT NOT NULL
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS semantic_models (
-            workspace_id TEXT NOT NULL,
-            model_id TEXT NOT NULL,
-            name TEXT NOT NULL,
-            added_at TEXT NOT NULL,
-            deleted_at TEXT,
-            PRIMARY KEY (workspace_id, model_id)
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS refresh_history (
-            workspace_id TEXT NOT NULL,
-            dataset_id TEXT NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT,
-            status TEXT,
-            duration_seconds REAL,
-            recorded_at TEXT NOT NULL,
-            PRIMARY KEY (workspace_id, dataset_id, start_time)
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS reports (
-            workspace_id TEXT NOT NULL,
-            report_id TEXT NOT NULL,
-            name TEXT,
-            dataset_id TEXT,
-            web_url TEXT,
-            embed_url TEXT,
-            created_at TEXT,
-            PRIMARY KEY (workspace_id, report_id)
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS schedules (
-            workspace_id TEXT NOT NULL,
-            dataset_id TEXT NOT NULL,
-            schedule_json TEXT,
-            updated_at TEXT NOT NULL,
-            PRIMARY KEY (workspace_id, dataset_id)
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS capacity_metrics (
-            capacity_id TEXT NOT NULL,
-            ts TEXT NOT NULL,
-            metric TEXT DEFAULT 'cu',
-            value REAL,
-            recorded_at TEXT NOT NULL,
-            PRIMARY KEY (capacity_id, ts, metric)
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
+    with _db() as conn:
+        conn.executescript(_SCHEMA_SQL)
+
+
+def cache_get(key: str):
+    """Return the unexpired api_cache value for key, or None.
+
+    Values are opaque strings; callers own (de)serialization. This backs the
+    in-memory fetch caches so a restarted process comes up warm instead of
+    re-paying the full API round-trip.
+    """
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT value FROM api_cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+
+def cache_put(key: str, value: str, ttl_seconds: float):
+    with _db() as conn:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO api_cache(key, value, expires) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            # opportunistic sweep; the table stays tiny so this is cheap
+            conn.execute("DELETE FROM api_cache WHERE expires < ?", (time.time(),))
 
 
 def load_categories():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT workspace_id, env, module FROM categories")
-    categories = {}
-    for workspace_id, env, module in cur.fetchall():
-        categories[workspace_id] = {"env": env, "module": module}
-    conn.close()
-    return categories
+    cached = _cache_get(("categories",))
+    if cached is not None:
+        return cached
+    with _db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT workspace_id, env, module FROM categories")
+        categories = {}
+        for workspace_id, env, module in cur:
+            categories[workspace_id] = {"env": env, "module": module}
+        return _cache_put(("categories",), categories)
 
 
 def upsert_category(workspace_id: str, env: str, module: str):
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        """
-        INSERT INTO categories(workspace_id, env, module, updated_at)
-        VALUES (?, ?, ?, datetime('now'))
-        ON CONFLICT(workspace_id) DO UPDATE SET
-            env=excluded.env,
-            module=excluded.module,
-            updated_at=datetime('now')
-        """,
-        (workspace_id, env, module),
-    )
-    conn.commit()
-    conn.close()
+    with _db() as conn:
+        # read-compare-skip: UIs re-sync categories on every save, and an
+        # unchanged row would still cost a WAL frame + fsync. The PK lookup
+        # is microseconds; the skipped commit is the expensive part.
+        row = conn.execute(
+            "SELECT env, module FROM categories WHERE workspace_id = ?", (workspace_id,)
+        ).fetchone()
+        if row is not None and (row["env"], row["module"]) == (env, module):
+            return
+        conn.execute(SQL_UPSERT_CATEGORY, (workspace_id, env, module, datetime.utcnow().isoformat()))
+        conn.commit()
+    _cache_invalidate(("categories",))
 
 
 def load_semantic_models_by_workspace():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT workspace_id, model_id, name, added_at, deleted_at FROM semantic_models")
-    data = {}
-    for workspace_id, model_id, name, added_at, deleted_at in cur.fetchall():
-        data.setdefault(workspace_id, []).append(
-            {
-                "model_id": model_id,
-                "name": name,
-                "added_at": added_at,
-                "deleted_at": deleted_at,
-            }
-        )
-    conn.close()
-    return data
+    cached = _cache_get(("models",))
+    if cached is not None:
+        return cached
+    with _db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT workspace_id, model_id, name, added_at, deleted_at FROM semantic_models")
+        # defaultdict skips the per-row setdefault key probe in these
+        # grouping loops; callers get a plain dict back
+        data = defaultdict(list)
+        for workspace_id, model_id, name, added_at, deleted_at in cur:
+            data[workspace_id].append(
+                {
+                    "model_id": model_id,
+                    "name": name,
+                    "added_at": added_at,
+                    "deleted_at": deleted_at,
+                }
+            )
+        return _cache_put(("models",), dict(data))
 
 
 def update_semantic_models(workspace_id, models):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT model_id, name, added_at, deleted_at FROM semantic_models WHERE workspace_id = ?",
-        (workspace_id,),
-    )
-    existing = {row[0]: {"name": row[1], "added_at": row[2], "deleted_at": row[3]} for row in cur.fetchall()}
-    now = datetime.utcnow().isoformat()
+    """Upsert the incoming model list and soft-delete the ones that vanished.
 
-    incoming_ids = set()
+    Fully set-based: one executemany upsert (added_at survives because the
+    ON CONFLICT clause doesn't touch it) plus one UPDATE marking live rows
+    not in the incoming set — no per-row existence probe in Python.
+    """
+    now = datetime.utcnow().isoformat()
+    incoming = []
     for model in models:
         mid = model.get("id") or model.get("model_id")
         if not mid:
             continue
-        incoming_ids.add(mid)
-        current = existing.get(mid)
-        added_at = current["added_at"] if current else now
-        conn.execute(
-            """
-            INSERT INTO semantic_models(workspace_id, model_id, name, added_at, deleted_at)
-            VALUES (?, ?, ?, ?, NULL)
-            ON CONFLICT(workspace_id, model_id) DO UPDATE SET
-                name=excluded.name,
-                deleted_at=NULL
-            """,
-            (workspace_id, mid, model.get("name") or model.get("displayName") or "(unnamed)", added_at),
-        )
-
-    missing_ids = set(existing.keys()) - incoming_ids
-    for mid in missing_ids:
-        if existing[mid]["deleted_at"] is None:
+        incoming.append((workspace_id, mid, model.get("name") or model.get("displayName") or "(unnamed)", now))
+    ids = [row[1] for row in incoming]
+    not_in = f" AND model_id NOT IN ({','.join('?' * len(ids))})" if ids else ""
+    with _db() as conn:
+        with conn:
+            conn.executemany(SQL_UPSERT_MODEL, incoming)
             conn.execute(
-                "UPDATE semantic_models SET deleted_at = ? WHERE workspace_id = ? AND model_id = ?",
-                (now, workspace_id, mid),
+                "UPDATE semantic_models SET deleted_at = ? WHERE workspace_id = ? AND deleted_at IS NULL" + not_in,
+                [now, workspace_id, *ids],
             )
+    _cache_invalidate(("models",))
 
-    conn.commit()
-    conn.close()
+
+@lru_cache(maxsize=4096)
+def _parse_iso(s: str):
+    """Memoized ISO-8601 parse; overlapping poll windows repost the same
+    refresh records, so repeated timestamps hit the cache instead of
+    re-allocating a datetime per row. Returns None on malformed input."""
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        return None
 
 
 def save_refreshes(workspace_id: str, dataset_id: str, refreshes: list):
-    conn = sqlite3.connect(DB_PATH)
+    now = datetime.utcnow().isoformat()
+    rows = []
     for r in refreshes:
         start_time = r.get("startTime")
         end_time = r.get("endTime")
+        # canonical lowercase so consumers compare with == instead of .lower()
         status = r.get("status")
+        status = status.lower() if status else status
         duration_seconds = None
         if start_time and end_time:
-            try:
-                start_dt = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-                end_dt = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
+            start_dt = _parse_iso(start_time)
+            end_dt = _parse_iso(end_time)
+            if start_dt is not None and end_dt is not None:
                 duration_seconds = (end_dt - start_dt).total_seconds()
-            except Exception:
-                duration_seconds = None
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO refresh_history(workspace_id, dataset_id, start_time, end_time, status, duration_seconds, recorded_at)
-            VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
-            """,
-            (workspace_id, dataset_id, start_time, end_time, status, duration_seconds),
-        )
-    conn.commit()
-    conn.close()
+        rows.append((workspace_id, dataset_id, start_time, end_time, status, duration_seconds, now))
+    with _db() as conn:
+        with conn:  # one transaction (and one fsync) for the whole batch
+            conn.executemany(SQL_INSERT_REFRESH, rows)
 
 
 def load_refreshes(workspace_id: str):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT dataset_id, start_time, end_time, status, duration_seconds FROM refresh_history WHERE workspace_id = ? ORDER BY start_time DESC",
-        (workspace_id,),
-    )
-    data = {}
-    for dataset_id, start_time, end_time, status, duration_seconds in cur.fetchall():
-        data.setdefault(dataset_id, []).append(
-            {
-                "start_time": start_time,
-                "end_time": end_time,
-                "status": status,
-                "duration_seconds": duration_seconds,
-            }
+    """Load refresh history for one workspace as {dataset_id: [refresh, ...]}.
+
+    Each dataset's list is ordered newest-first (start_time DESC), so callers
+    may treat index 0 as the latest refresh without re-sorting.
+    """
+    with _db() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT dataset_id, start_time, end_time, status, duration_seconds FROM refresh_history WHERE workspace_id = ? ORDER BY start_time DESC",
+            (workspace_id,),
+        )
+        data = defaultdict(list)
+        for dataset_id, start_time, end_time, status, duration_seconds in cur:
+            data[dataset_id].append(
+                {
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "status": status,
+                    "duration_seconds": duration_seconds,
+                }
+            )
+        return dict(data)
+
+
+def load_refreshes_bulk(workspace_ids):
+    """Load refresh history for many workspaces with one query.
+
+    Returns {workspace_id: {dataset_id: [refresh, ...]}} with the same row
+    shape and newest-first ordering as load_refreshes; every requested
+    workspace is present, mapped to {} when it has no history.
+    """
+    ws_ids = [w for w in workspace_ids if w]
+    if not ws_ids:
+        return {}
+    with _db() as conn:
+        cur = conn.cursor()
+        placeholders = ",".join("?" * len(ws_ids))
+        cur.execute(
+            "SELECT workspace_id, dataset_id, start_time, end_time, status, duration_seconds FROM refresh_history "
+            f"WHERE workspace_id IN ({placeholders}) ORDER BY start_time DESC",
+            ws_ids,
         )
-    conn.close()
-    return data
+        data = {ws_id: defaultdict(list) for ws_id in ws_ids}
+        for workspace_id, dataset_id, start_time, end_time, status, duration_seconds in cur:
+            data[workspace_id][dataset_id].append(
+                {
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "status": status,
+                    "duration_seconds": duration_seconds,
+                }
+            )
+        return {ws_id: dict(by_ds) for ws_id, by_ds in data.items()}
 
 
 def save_capacity_metrics(capacity_id: str, points: list):
     if not capacity_id or not points:
         return
-    conn = sqlite3.connect(DB_PATH)
+    now = datetime.utcnow().isoformat()
+    rows = []
     for p in points:
         ts = p.get("ts") or p.get("timestamp")
         val = p.get("cu") if p.get("cu") is not None else p.get("value")
         metric = p.get("metric") or "cu"
         if not ts:
             continue
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO capacity_metrics(capacity_id, ts, metric, value, recorded_at)
-            VALUES (?, ?, ?, ?, datetime('now'))
-            """,
-            (capacity_id, ts, metric, val),
-        )
-    conn.commit()
-    conn.close()
+        rows.append((capacity_id, ts, metric, val, now))
+    with _db() as conn:
+        with conn:  # one transaction (and one fsync) for the whole batch
+            conn.executemany(SQL_INSERT_METRIC, rows)
 
 
 def load_capacity_metrics(capacity_id: str, start_iso: str | None = None, end_iso: str | None = None):
     if not capacity_id:
         return []
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    sql = "SELECT ts, metric, value FROM capacity_metrics WHERE capacity_id = ?"
-    args = [capacity_id]
-    if start_iso:
-        sql += " AND ts >= ?"
-        args.append(start_iso)
-    if end_iso:
-        sql += " AND ts <= ?"
-        args.append(end_iso)
-    sql += " ORDER BY ts ASC"
-    cur.execute(sql, args)
-    data = []
-    for ts, metric, value in cur.fetchall():
-        data.append({"ts": ts, "metric": metric, "value": value})
-    conn.close()
-    return data
+    with _db() as conn:
+        cur = conn.cursor()
+        sql = "SELECT ts, metric, value FROM capacity_metrics WHERE capacity_id = ?"
+        args = [capacity_id]
+        if start_iso:
+            sql += " AND ts >= ?"
+            args.append(start_iso)
+        if end_iso:
+            sql += " AND ts <= ?"
+            args.append(end_iso)
+        sql += " ORDER BY ts ASC"
+        cur.execute(sql, args)
+        data = []
+        for ts, metric, value in cur:
+            data.append({"ts": ts, "metric": metric, "value": value})
+        return data
 
 
 def save_reports(workspace_id: str, reports: list):
     if not workspace_id or reports is None:
         return
-    conn = sqlite3.connect(DB_PATH)
-    for rep in reports:
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO reports(workspace_id, report_id, name, dataset_id, web_url, embed_url, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                workspace_id,
-                rep.get("id") or rep.get("report_id"),
-                rep.get("name"),
-                rep.get("datasetId") or rep.get("dataset_id"),
-                rep.get("webUrl") or rep.get("web_url"),
-                rep.get("embedUrl") or rep.get("embed_url"),
-                rep.get("createdDate") or rep.get("created_at"),
-            ),
+    rows = [
+        (
+            workspace_id,
+            rep.get("id") or rep.get("report_id"),
+            rep.get("name"),
+            rep.get("datasetId") or rep.get("dataset_id"),
+            rep.get("webUrl") or rep.get("web_url"),
+            rep.get("embedUrl") or rep.get("embed_url"),
+            rep.get("createdDate") or rep.get("created_at"),
         )
-    conn.commit()
-    conn.close()
+        for rep in reports
+    ]
+    with _db() as conn:
+        with conn:  # one transaction (and one fsync) for the whole batch
+            conn.executemany(SQL_INSERT_REPORT, rows)
+    _cache_invalidate(("reports", workspace_id))
 
 
 def load_reports_by_workspace(workspace_id: str):
     if not workspace_id:
         return {}
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT report_id, name, dataset_id, web_url, embed_url, created_at FROM reports WHERE workspace_id = ?",
-        (workspace_id,),
-    )
-    data = {}
-    for report_id, name, dataset_id, web_url, embed_url, created_at in cur.fetchall():
-        data.setdefault(dataset_id or "", []).append(
-            {
-                "id": report_id,
-                "name": name,
-                "datasetId": dataset_id,
-                "webUrl": web_url,
-                "embedUrl": embed_url,
-                "created_at": created_at,
-            }
+    cached = _cache_get(("reports", workspace_id))
+    if cached is not None:
+        return cached
+    with _db() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT report_id, name, dataset_id, web_url, embed_url, created_at FROM reports WHERE workspace_id = ?",
+            (workspace_id,),
         )
-    conn.close()
-    return data
+        data = defaultdict(list)
+        for report_id, name, dataset_id, web_url, embed_url, created_at in cur:
+            data[dataset_id or ""].append(
+                {
+                    "id": report_id,
+                    "name": name,
+                    "datasetId": dataset_id,
+                    "webUrl": web_url,
+                    "embedUrl": embed_url,
+                    "created_at": created_at,
+                }
+            )
+        return _cache_put(("reports", workspace_id), dict(data))
 
 
 def save_schedule(workspace_id: str, dataset_id: str, schedule: dict | str):
     if not workspace_id or not dataset_id:
         return
-    sched_str = schedule if isinstance(schedule, str) else json.dumps(schedule)
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        """
-        INSERT OR REPLACE INTO schedules(workspace_id, dataset_id, schedule_json, updated_at)
-        VALUES (?, ?, ?, datetime('now'))
-        """,
-        (workspace_id, dataset_id, sched_str),
-    )
-    conn.commit()
-    conn.close()
+    sched_str = schedule if isinstance(schedule, str) else orjson.dumps(schedule).decode()
+    with _db() as conn:
+        # same no-op skip as upsert_category: reposting an identical schedule
+        # shouldn't pay a write
+        row = conn.execute(
+            "SELECT schedule_json FROM schedules WHERE workspace_id = ? AND dataset_id = ?",
+            (workspace_id, dataset_id),
+        ).fetchone()
+        if row is not None and row["schedule_json"] == sched_str:
+            return
+        conn.execute(SQL_UPSERT_SCHEDULE, (workspace_id, dataset_id, sched_str, datetime.utcnow().isoformat()))
+        conn.commit()
+    _cache_invalidate(("schedules", workspace_id))
 
 
 def load_schedules_by_workspace(workspace_id: str):
     if not workspace_id:
         return {}
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT dataset_id, schedule_json FROM schedules WHERE workspace_id = ?",
-        (workspace_id,),
-    )
-    data = {}
-    for ds_id, sched in cur.fetchall():
-        try:
-            parsed = json.loads(sched)
-        except Exception:
-            parsed = sched
-        data[ds_id] = parsed
-    conn.close()
-    return data
+    cached = _cache_get(("schedules", workspace_id))
+    if cached is not None:
+        return cached
+    with _db() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT dataset_id, schedule_json FROM schedules WHERE workspace_id = ?",
+            (workspace_id,),
+        )
+        data = {}
+        for ds_id, sched in cur:
+            try:
+                parsed = orjson.loads(sched)
+            except (orjson.JSONDecodeError, ValueError):
+                parsed = sched
+            data[ds_id] = parsed
+        return _cache_put(("schedules", workspace_id), data)
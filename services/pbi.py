@@ -1,7 +1,13 @@
-﻿import json
+﻿import atexit
 import os
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+
+from services import db
 
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 TENANT_ID = os.environ.get("PBI_TENANT_ID", "common")
@@ -11,24 +17,114 @@ POWERSHELL_SCRIPT = os.environ.get(
 )
 CACHE_SECONDS = int(os.environ.get("PBI_WORKSPACE_CACHE_SECONDS", "300"))
 LOG_PATH = os.environ.get("PBI_LOG_PATH", os.path.join(ROOT_DIR, "ps_debug.log"))
+VERBOSE_LOG = os.environ.get("PBI_LOG_VERBOSE") == "1"
+
+# Service-principal credentials switch on the direct REST path; without them
+# we fall back to the PowerShell device-code flow (which stores no secret).
+# PBI_FORCE_POWERSHELL=1 forces the fallback even when credentials are set.
+API_ROOT = "https://api.powerbi.com/v1.0/myorg"
+PBI_SCOPES = ["https://analysis.windows.net/powerbi/api/.default"]
+CLIENT_ID = os.environ.get("PBI_CLIENT_ID")
+CLIENT_SECRET = os.environ.get("PBI_CLIENT_SECRET")
+USE_REST = bool(CLIENT_ID and CLIENT_SECRET) and os.environ.get("PBI_FORCE_POWERSHELL") != "1"
 
 workspace_cache = {"data": None, "expires": 0.0}
+_workspace_lock = threading.Lock()
+
+# Thread count for the *_many fan-out helpers; matches the app-side fan-out.
+_MAX_FANOUT = 8
+
+_session = None
+_token = {"value": None, "expires": 0.0}
+_token_lock = threading.Lock()
+
+
+def _get_session():
+    """Shared requests.Session so all REST calls reuse one TLS connection."""
+    global _session
+    if _session is None:
+        import requests  # deferred: only needed on the REST path
+
+        _session = requests.Session()
+    return _session
+
+
+def _get_token():
+    """Return a cached bearer token, refreshing it a minute before expiry."""
+    if _token["value"] and time.time() < _token["expires"]:
+        return _token["value"]
+    with _token_lock:
+        if _token["value"] and time.time() < _token["expires"]:
+            return _token["value"]
+        import msal  # deferred: only needed on the REST path
+
+        app = msal.ConfidentialClientApplication(
+            CLIENT_ID,
+            authority=f"https://login.microsoftonline.com/{TENANT_ID}",
+            client_credential=CLIENT_SECRET,
+        )
+        result = app.acquire_token_for_client(scopes=PBI_SCOPES)
+        if "access_token" not in result:
+            raise RuntimeError(
+                f"Token acquisition failed: {result.get('error_description') or result}"
+            )
+        _token["value"] = result["access_token"]
+        _token["expires"] = time.time() + int(result.get("expires_in", 3600)) - 60
+        return _token["value"]
+
+
+def _rest(method, path, payload=None, label=None):
+    """One HTTPS call against the Power BI API; raises RuntimeError on 4xx/5xx.
+
+    Replaces a full powershell.exe spawn (interpreter + module load) per call
+    on deployments that configure a service principal.
+    """
+    resp = _get_session().request(
+        method,
+        API_ROOT + path,
+        headers={"Authorization": f"Bearer {_get_token()}"},
+        json=payload,
+        timeout=60,
+    )
+    _log(label or f"rest {method} {path}", f"HTTP {resp.status_code}")
+    if resp.status_code >= 400:
+        raise RuntimeError(f"Power BI API {method} {path} returned {resp.status_code}: {resp.text}")
+    if not resp.content:
+        return {}
+    return resp.json()
+
+
+# One long-lived line-buffered handle instead of an open/write/close per
+# call; opened only when PBI_LOG_VERBOSE=1, so the default success path pays
+# zero logging I/O. Failure detail still surfaces in the raised exception.
+_LOG_FH = None
+if VERBOSE_LOG:
+    try:
+        _LOG_FH = open(LOG_PATH, "a", encoding="utf-8", buffering=1)
+        atexit.register(_LOG_FH.close)
+    except OSError:
+        _LOG_FH = None
 
 
 def _log(label, content):
-    if not label:
+    if _LOG_FH is None or not label:
         return
     try:
-        with open(LOG_PATH, "a", encoding="utf-8") as fh:
-            fh.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {label}\n")
-            fh.write(content or "")
-            if not (content or "").endswith("\n"):
-                fh.write("\n")
+        _LOG_FH.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {label}\n")
+        _LOG_FH.write(content or "")
+        if not (content or "").endswith("\n"):
+            _LOG_FH.write("\n")
     except Exception:
         pass
 
 
 def _run_ps(args, label=None):
+    """Run the PS helper and return its stdout as raw bytes.
+
+    orjson.loads consumes bytes directly, so the success path skips the
+    utf-8 decode of potentially multi-MB output entirely; we only decode
+    for logging on failure or when PBI_LOG_VERBOSE is on.
+    """
     cmd = [
         "powershell",
         "-NoProfile",
@@ -39,47 +135,104 @@ def _run_ps(args, label=None):
         "-TenantId",
         TENANT_ID,
     ] + args
-    proc = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
-    stdout = proc.stdout or ""
-    stderr = proc.stderr or ""
-    _log(label or "ps-call", stdout if stdout else stderr)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = proc.communicate()
+    stdout = stdout or b""
+    stderr = stderr or b""
     if proc.returncode != 0:
-        raise RuntimeError(f"PowerShell exited {proc.returncode}: {stderr or stdout}")
+        detail = (stderr or stdout).decode("utf-8", errors="replace")
+        _log(label or "ps-call", detail)
+        raise RuntimeError(f"PowerShell exited {proc.returncode}: {detail}")
+    if VERBOSE_LOG:
+        _log(label or "ps-call", (stdout or stderr).decode("utf-8", errors="replace"))
     return stdout
 
 
-def fetch_workspaces():
-    now = time.time()
-    if workspace_cache["data"] is not None and now < workspace_cache["expires"]:
+def fetch_workspaces(force_refresh: bool = False):
+    """Return the workspace list, served from a TTL cache for CACHE_SECONDS.
+
+    Every page hits this, so concurrent and back-to-back requests share one
+    PowerShell round-trip; the lock makes sure a cold/expired cache is filled
+    exactly once. ``force_refresh`` bypasses the cache (admin refresh).
+    """
+    if not force_refresh and workspace_cache["data"] is not None and time.time() < workspace_cache["expires"]:
         return workspace_cache["data"]
 
-    stdout = _run_ps([], label="workspaces")
-    try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+    with _workspace_lock:
+        # another request may have refreshed while we waited for the lock
+        if not force_refresh and workspace_cache["data"] is not None and time.time() < workspace_cache["expires"]:
+            return workspace_cache["data"]
 
-    if "workspaces" not in data:
-        raise RuntimeError(f"Unexpected response: {data}")
+        # persisted tier: a freshly restarted process comes up warm instead
+        # of paying the full PowerShell/REST round-trip on its first request
+        if not force_refresh:
+            cached = db.cache_get("workspaces")
+            if cached is not None:
+                try:
+                    workspaces = orjson.loads(cached)
+                except ValueError:
+                    workspaces = None
+                if workspaces is not None:
+                    workspace_cache["data"] = workspaces
+                    workspace_cache["expires"] = time.time() + CACHE_SECONDS
+                    return workspaces
 
-    workspace_cache["data"] = data["workspaces"]
-    workspace_cache["expires"] = time.time() + CACHE_SECONDS
-    return workspace_cache["data"]
+        if USE_REST:
+            workspaces = _rest("GET", "/groups", label="workspaces").get("value", [])
+        else:
+            stdout = _run_ps([], label="workspaces")
+            try:
+                data = orjson.loads(stdout)
+            except (orjson.JSONDecodeError, ValueError) as exc:
+                raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
+
+            if "workspaces" not in data:
+                raise RuntimeError(f"Unexpected response: {data}")
+            workspaces = data["workspaces"]
+
+        workspace_cache["data"] = workspaces
+        workspace_cache["expires"] = time.time() + CACHE_SECONDS
+        try:
+            db.cache_put("workspaces", orjson.dumps(workspaces).decode(), CACHE_SECONDS)
+        except Exception:  # cache persistence is best-effort
+            pass
+        return workspace_cache["data"]
 
 
 def fetch_semantic_models(workspace_id: str):
+    if USE_REST:
+        return _rest("GET", f"/groups/{workspace_id}/datasets", label=f"models {workspace_id}").get(
+            "value", []
+        )
     stdout = _run_ps(["-Mode", "models", "-WorkspaceId", workspace_id], label=f"models {workspace_id}")
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
 
     if "datasets" not in data:
         raise RuntimeError(f"Unexpected response: {data}")
     return data["datasets"]
 
 
+def fetch_semantic_models_many(workspace_ids):
+    """Fetch models for many workspaces in parallel; returns {workspace_id: models}.
+
+    Each call is I/O-bound (network or PowerShell process wait), so threads
+    overlap them and wall time drops to roughly ceil(N / _MAX_FANOUT) calls.
+    """
+    ids = list(workspace_ids)
+    with ThreadPoolExecutor(max_workers=_MAX_FANOUT) as ex:
+        return dict(zip(ids, ex.map(fetch_semantic_models, ids)))
+
+
 def fetch_refreshes(workspace_id: str, dataset_id: str, top: int = 10):
+    if USE_REST:
+        return _rest(
+            "GET",
+            f"/groups/{workspace_id}/datasets/{dataset_id}/refreshes?$top={int(top)}",
+            label=f"refreshes {workspace_id}/{dataset_id} top={top}",
+        ).get("value", [])
     stdout = _run_ps(
         [
             "-Mode",
@@ -94,9 +247,9 @@ def fetch_refreshes(workspace_id: str, dataset_id: str, top: int = 10):
         label=f"refreshes {workspace_id}/{dataset_id} top={top}",
     )
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
 
     if "refreshes" not in data:
         raise RuntimeError(f"Unexpected response: {data}")
@@ -104,6 +257,14 @@ def fetch_refreshes(workspace_id: str, dataset_id: str, top: int = 10):
 
 
 def trigger_refresh(workspace_id: str, dataset_id: str):
+    if USE_REST:
+        _rest(
+            "POST",
+            f"/groups/{workspace_id}/datasets/{dataset_id}/refreshes",
+            payload={"notifyOption": "NoNotification"},
+            label=f"trigger {workspace_id}/{dataset_id}",
+        )
+        return {"status": "accepted"}
     stdout = _run_ps(
         [
             "-Mode",
@@ -116,14 +277,18 @@ def trigger_refresh(workspace_id: str, dataset_id: str):
         label=f"trigger {workspace_id}/{dataset_id}",
     )
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
 
     return data
 
 
 def fetch_workspace_reports(workspace_id: str):
+    if USE_REST:
+        return _rest("GET", f"/groups/{workspace_id}/reports", label=f"reports {workspace_id}").get(
+            "value", []
+        )
     stdout = _run_ps(
         [
             "-Mode",
@@ -134,16 +299,29 @@ def fetch_workspace_reports(workspace_id: str):
         label=f"reports {workspace_id}",
     )
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
 
     if "reports" not in data:
         raise RuntimeError(f"Unexpected response: {data}")
     return data["reports"]
 
 
+def fetch_workspace_reports_many(workspace_ids):
+    """Fetch reports for many workspaces in parallel; returns {workspace_id: reports}."""
+    ids = list(workspace_ids)
+    with ThreadPoolExecutor(max_workers=_MAX_FANOUT) as ex:
+        return dict(zip(ids, ex.map(fetch_workspace_reports, ids)))
+
+
 def fetch_refresh_schedule(workspace_id: str, dataset_id: str):
+    if USE_REST:
+        return _rest(
+            "GET",
+            f"/groups/{workspace_id}/datasets/{dataset_id}/refreshSchedule",
+            label=f"schedule-get {workspace_id}/{dataset_id}",
+        )
     stdout = _run_ps(
         [
             "-Mode",
@@ -156,16 +334,42 @@ def fetch_refresh_schedule(workspace_id: str, dataset_id: str):
         label=f"schedule-get {workspace_id}/{dataset_id}",
     )
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
 
     if "schedule" not in data:
         raise RuntimeError(f"Unexpected response: {data}")
     return data["schedule"]
 
 
+def fetch_refresh_schedules_many(workspace_id: str, dataset_ids):
+    """Fetch refresh schedules for many datasets in one workspace in parallel.
+
+    Returns {dataset_id: schedule}; a dataset whose fetch failed maps to None
+    so one bad dataset doesn't sink the whole batch.
+    """
+    ids = list(dataset_ids)
+
+    def _one(dataset_id):
+        try:
+            return fetch_refresh_schedule(workspace_id, dataset_id)
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    with ThreadPoolExecutor(max_workers=_MAX_FANOUT) as ex:
+        return dict(zip(ids, ex.map(_one, ids)))
+
+
 def update_refresh_schedule(workspace_id: str, dataset_id: str, schedule_payload: dict):
+    if USE_REST:
+        _rest(
+            "PATCH",
+            f"/groups/{workspace_id}/datasets/{dataset_id}/refreshSchedule",
+            payload=schedule_payload,
+            label=f"schedule-set {workspace_id}/{dataset_id}",
+        )
+        return {"status": "updated"}
     stdout = _run_ps(
         [
             "-Mode",
@@ -175,18 +379,25 @@ def update_refresh_schedule(workspace_id: str, dataset_id: str, schedule_payload
             "-DatasetId",
             dataset_id,
             "-ScheduleJson",
-            json.dumps(schedule_payload),
+            orjson.dumps(schedule_payload).decode(),
         ],
         label=f"schedule-set {workspace_id}/{dataset_id}",
     )
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
     return data
 
 
 def takeover_dataset(workspace_id: str, dataset_id: str):
+    if USE_REST:
+        _rest(
+            "POST",
+            f"/groups/{workspace_id}/datasets/{dataset_id}/Default.TakeOver",
+            label=f"takeover {workspace_id}/{dataset_id}",
+        )
+        return {"status": "taken-over"}
     stdout = _run_ps(
         [
             "-Mode",
@@ -199,7 +410,7 @@ def takeover_dataset(workspace_id: str, dataset_id: str):
         label=f"takeover {workspace_id}/{dataset_id}",
     )
     try:
-        data = json.loads(stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout}")
+        data = orjson.loads(stdout)
+    except (orjson.JSONDecodeError, ValueError) as exc:
+        raise RuntimeError(f"Could not parse PowerShell output: {exc}\nRaw output:\n{stdout.decode('utf-8', errors='replace')}")
     return data
@@ -0,0 +1,37 @@
+"""Aggregation kernels for the performance views.
+
+These hold the tight per-dataset loops that dominate /performance CPU time,
+kept free of Flask/SQL concerns so they stay easy to profile in isolation.
+Callers pass rows prepared by app._prepare_refreshes (keys: _completed,
+duration_seconds, _ts).
+"""
+
+
+def aggregate_refreshes(rlist):
+    """One pass over a dataset's refresh rows.
+
+    Returns (failures, successes, avg_sec) where avg_sec is 0 when no row
+    carries a duration.
+    """
+    failures = successes = 0
+    dur_sum = 0.0
+    dur_count = 0
+    for r in rlist:
+        if r["_completed"]:
+            successes += 1
+        else:
+            failures += 1
+        d = r["duration_seconds"]
+        if d is not None:
+            dur_sum += d
+            dur_count += 1
+    avg_sec = dur_sum / dur_count if dur_count else 0
+    return failures, successes, avg_sec
+
+
+def mean_interval_hours(timestamps):
+    """Mean gap in hours between ascending epoch-second floats (0 if < 2)."""
+    if len(timestamps) < 2:
+        return 0
+    # evenly telescoping: mean gap is just span / gap count
+    return (timestamps[-1] - timestamps[0]) / (len(timestamps) - 1) / 3600.0
@@ -0,0 +1,9 @@
+"""WSGI entry point for production servers.
+
+Run with, e.g.:
+    gunicorn -w 4 -k gthread --threads 8 --preload wsgi:app
+
+--preload imports the app (and runs init_db, warms module caches) once in
+the master so forked workers share that work copy-on-write.
+"""
+from app import app  # noqa: F401